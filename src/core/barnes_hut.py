@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+
+"""
+Barnes-Hut octree for Interstonar.
+Approximates the gravitational pull of distant groups of bodies by their
+center of mass, bringing the force calculation from O(N^2) to O(N log N).
+"""
+
+from bisect import bisect_left
+
+# Bits per axis of the Morton codes, which is also the maximum tree depth
+MORTON_BITS = 21
+
+
+def part1by2(n):
+    """Spread the 21 low bits of n so that two zero bits separate each of them."""
+    n &= 0x1fffff
+    n = (n | n << 32) & 0x1f00000000ffff
+    n = (n | n << 16) & 0x1f0000ff0000ff
+    n = (n | n << 8) & 0x100f00f00f00f00f
+    n = (n | n << 4) & 0x10c30c30c30c30c3
+    n = (n | n << 2) & 0x1249249249249249
+    return n
+
+
+class Octree:
+    """
+    Octree stored as parallel arrays indexed by node, in depth-first order.
+
+    Bodies are sorted by Morton code (order), so every node covers the
+    contiguous range order[first:last]. For each node: width of the cell,
+    total mass, center of mass (com_x, com_y, com_z), whether it is a leaf,
+    and skip, the index of the next node once its subtree is done. The
+    first child of an internal node is always the node right after it.
+    """
+
+    def __init__(self):
+        self.order = []
+        self.first = []
+        self.last = []
+        self.width = []
+        self.mass = []
+        self.com_x = []
+        self.com_y = []
+        self.com_z = []
+        self.leaf = []
+        self.skip = []
+
+
+def build_octree(xs, ys, zs, masses):
+    """
+    Build an octree from Morton-sorted bodies.
+
+    Coordinates are quantized on a 2^21 grid spanning the bounding cube,
+    bit-interleaved into Morton codes and sorted. Each cell is then split
+    top-down by looking up the boundaries of its 8 octants in the sorted
+    codes.
+
+    Args:
+        xs, ys, zs (list): Coordinates of the bodies
+        masses (list): Masses of the bodies
+
+    Returns:
+        Octree: Tree with masses and centers of mass computed
+    """
+    tree = Octree()
+    n = len(masses)
+    if n == 0:
+        return tree
+
+    # The root cell is the bounding cube of every body
+    min_x, min_y, min_z = min(xs), min(ys), min(zs)
+    size = max(max(xs) - min_x, max(ys) - min_y, max(zs) - min_z)
+    if size == 0:
+        size = 1.0
+
+    top = (1 << MORTON_BITS) - 1
+    scale = (1 << MORTON_BITS) / size
+    codes = [
+        part1by2(min(int((xs[i] - min_x) * scale), top))
+        | part1by2(min(int((ys[i] - min_y) * scale), top)) << 1
+        | part1by2(min(int((zs[i] - min_z) * scale), top)) << 2
+        for i in range(n)
+    ]
+    order = sorted(range(n), key=codes.__getitem__)
+    codes = [codes[i] for i in order]
+    tree.order = order
+
+    def build(lo, hi, level, width):
+        node = len(tree.mass)
+        mass = sum_x = sum_y = sum_z = 0.0
+        for b in order[lo:hi]:
+            m = masses[b]
+            mass += m
+            sum_x += m * xs[b]
+            sum_y += m * ys[b]
+            sum_z += m * zs[b]
+
+        tree.first.append(lo)
+        tree.last.append(hi)
+        tree.width.append(width)
+        tree.mass.append(mass)
+        if mass > 0:
+            tree.com_x.append(sum_x / mass)
+            tree.com_y.append(sum_y / mass)
+            tree.com_z.append(sum_z / mass)
+        else:
+            b = order[lo]
+            tree.com_x.append(xs[b])
+            tree.com_y.append(ys[b])
+            tree.com_z.append(zs[b])
+        is_leaf = hi - lo == 1 or level == MORTON_BITS
+        tree.leaf.append(is_leaf)
+        tree.skip.append(0)
+
+        if not is_leaf:
+            # Codes in this cell share their top 3*level bits; the next 3 bits give the octant
+            shift = 3 * (MORTON_BITS - 1 - level)
+            base = codes[lo] >> (shift + 3) << (shift + 3)
+            start = lo
+            for octant in range(1, 9):
+                end = bisect_left(codes, base + (octant << shift), start, hi)
+                if end > start:
+                    build(start, end, level + 1, width / 2)
+                start = end
+
+        tree.skip[node] = len(tree.mass)
+
+    build(0, n, 0, size)
+    return tree
+
+
+def bh_force(i, tree, xs, ys, zs, masses, g, theta=0.5):
+    """
+    Calculate the gravitational force on body i by walking the octree.
+
+    A cell whose width seen from the body is below theta is replaced by a
+    pseudo-particle at its center of mass. With theta below 1/sqrt(3) a cell
+    containing body i is never approximated, so the body never pulls itself.
+    The walk follows the depth-first layout: descend to the next node, or
+    jump over a whole subtree with skip.
+
+    Args:
+        i (int): Index of the body
+        tree (Octree): Tree built from the same coordinates and masses
+        xs, ys, zs (list): Coordinates of the bodies
+        masses (list): Masses of the bodies
+        g (float): Gravitational constant
+        theta (float): Opening angle
+
+    Returns:
+        tuple: Force vector (fx, fy, fz) acting on body i
+    """
+    xi, yi, zi = xs[i], ys[i], zs[i]
+    gm = g * masses[i]
+    sum_x = sum_y = sum_z = 0.0
+    theta2 = theta * theta
+
+    order, first, last, leaf, skip = tree.order, tree.first, tree.last, tree.leaf, tree.skip
+    width, node_mass = tree.width, tree.mass
+    com_x, com_y, com_z = tree.com_x, tree.com_y, tree.com_z
+    node = 0
+    count = len(node_mass)
+
+    while node < count:
+        if leaf[node]:
+            # Leaves are summed directly, skipping the body itself
+            for b in order[first[node]:last[node]]:
+                if b == i:
+                    continue
+                dx = xs[b] - xi
+                dy = ys[b] - yi
+                dz = zs[b] - zi
+                r2 = dx * dx + dy * dy + dz * dz
+                if r2 == 0:
+                    continue
+                k = gm * masses[b] * r2 ** -1.5
+                sum_x += dx * k
+                sum_y += dy * k
+                sum_z += dz * k
+            node = skip[node]
+            continue
+
+        dx = com_x[node] - xi
+        dy = com_y[node] - yi
+        dz = com_z[node] - zi
+        r2 = dx * dx + dy * dy + dz * dz
+        w = width[node]
+
+        if w * w < theta2 * r2:
+            # Far enough: use the cell's center of mass as a pseudo-particle
+            k = gm * node_mass[node] * r2 ** -1.5
+            sum_x += dx * k
+            sum_y += dy * k
+            sum_z += dz * k
+            node = skip[node]
+        else:
+            node += 1
+
+    return sum_x, sum_y, sum_z
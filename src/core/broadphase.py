@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+"""
+Collision broad phase for Interstonar.
+Buckets bodies in a uniform grid so that only bodies in neighboring cells
+are tested against each other.
+"""
+
+import math
+
+
+def build_grid(xs, ys, zs, cell_size):
+    """
+    Bucket body indices by grid cell.
+
+    Args:
+        xs, ys, zs (list): Coordinates of the bodies
+        cell_size (float): Width of a grid cell
+
+    Returns:
+        dict: Mapping (ix, iy, iz) -> list of body indices in that cell
+    """
+    floor = math.floor
+    inv = 1 / cell_size
+    cells = {}
+
+    for i in range(len(xs)):
+        key = (floor(xs[i] * inv), floor(ys[i] * inv), floor(zs[i] * inv))
+        bucket = cells.get(key)
+        if bucket is None:
+            cells[key] = [i]
+        else:
+            bucket.append(i)
+
+    return cells
+
+
+def uniform_grid_pairs(xs, ys, zs, radii):
+    """
+    Find all pairs of overlapping spheres using a uniform grid.
+
+    The cell size is twice the largest radius, so two overlapping spheres
+    always sit in the same or in neighboring cells.
+
+    Args:
+        xs, ys, zs (list): Coordinates of the sphere centers
+        radii (list): Radii of the spheres
+
+    Returns:
+        list: Sorted list of colliding pairs as tuples (i, j) where i < j
+    """
+    collisions = []
+    if not radii:
+        return collisions
+
+    # With zero radii only coincident centers collide: any cell size works
+    cell_size = 2 * max(radii)
+    if cell_size <= 0:
+        cell_size = 1.0
+
+    cells = build_grid(xs, ys, zs, cell_size)
+    offsets = [(ox, oy, oz) for ox in (-1, 0, 1) for oy in (-1, 0, 1) for oz in (-1, 0, 1)]
+
+    for (cx, cy, cz), bucket in cells.items():
+        for ox, oy, oz in offsets:
+            neighbors = cells.get((cx + ox, cy + oy, cz + oz))
+            if neighbors is None:
+                continue
+
+            for i in bucket:
+                xi, yi, zi, ri = xs[i], ys[i], zs[i], radii[i]
+                for j in neighbors:
+                    # Each pair is seen from both of its cells: keep it once
+                    if j <= i:
+                        continue
+                    dx = xs[j] - xi
+                    dy = ys[j] - yi
+                    dz = zs[j] - zi
+                    radius_sum = ri + radii[j]
+                    if dx * dx + dy * dy + dz * dz <= radius_sum * radius_sum:
+                        collisions.append((i, j))
+
+    collisions.sort()
+    return collisions
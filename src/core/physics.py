@@ -5,8 +5,10 @@ Physics utility functions for Interstonar.
 Primarily used for global simulation calculations related to gravitation and motion.
 """
 
-import math
-from src.core.utils import calculate_distance, vector_subtract, vector_scale, vector_add
+from src.core.utils import (distance_squared, calculate_volume_sphere, calculate_radius_from_volume,
+                            average_position, weighted_average_vector)
+from src.core.barnes_hut import build_octree, bh_force
+from src.core.broadphase import uniform_grid_pairs
 
 # Gravitational constant (G)
 G = 6.674e-11  # m^3 kg^-1 s^-2
@@ -17,6 +19,12 @@ DELTA_TIME = 3600
 # Maximum simulation time (365 days in hours)
 MAX_STEPS = 365 * 24
 
+# Body count above which forces are approximated with a Barnes-Hut octree
+BARNES_HUT_THRESHOLD = 512
+
+# Opening angle of the Barnes-Hut approximation
+BARNES_HUT_THETA = 0.5
+
 
 def calculate_gravitational_force(body1, body2):
     """
@@ -27,72 +35,185 @@ def calculate_gravitational_force(body1, body2):
         body2 (dict): Second body with mass and position
 
     Returns:
-        dict: Force vector (x, y, z) acting on body1 due to body2
+        tuple: Force vector (fx, fy, fz) acting on body1 due to body2
     """
     # Get positions and masses
     pos1 = body1["position"]
     pos2 = body2["position"]
-    m1 = body1["mass"]
-    m2 = body2["mass"]
+    x1, y1, z1 = pos1["x"], pos1["y"], pos1["z"]
+    x2, y2, z2 = pos2["x"], pos2["y"], pos2["z"]
 
-    # Calculate distance and direction
-    distance = calculate_distance(pos1, pos2)
+    # Direction vector from body1 to body2
+    dx = x2 - x1
+    dy = y2 - y1
+    dz = z2 - z1
+    r2 = dx * dx + dy * dy + dz * dz
 
     # Avoid division by zero
-    if distance == 0:
-        return {"x": 0, "y": 0, "z": 0}
-
-    # Calculate direction vector from body1 to body2
-    direction = vector_subtract(pos2, pos1)
-
-    # Normalize direction vector
-    direction_magnitude = math.sqrt(direction["x"]**2 + direction["y"]**2 + direction["z"]**2)
-    unit_direction = {
-        "x": direction["x"] / direction_magnitude,
-        "y": direction["y"] / direction_magnitude,
-        "z": direction["z"] / direction_magnitude
-    }
+    if r2 == 0:
+        return 0.0, 0.0, 0.0
 
-    # Calculate force magnitude using Newton's law of universal gravitation
-    force_magnitude = G * m1 * m2 / (distance**2)
+    # Newton's law of universal gravitation: F = G*m1*m2 * r / |r|^3
+    # A single pow replaces the distance sqrt and the normalization
+    f = G * body1["mass"] * body2["mass"] * r2 ** -1.5
 
-    # Calculate force vector
-    force_vector = {
-        "x": unit_direction["x"] * force_magnitude,
-        "y": unit_direction["y"] * force_magnitude,
-        "z": unit_direction["z"] * force_magnitude
-    }
+    return f * dx, f * dy, f * dz
 
-    return force_vector
 
-
-def calculate_net_force(target_body, all_bodies):
+def calculate_net_force(target_body, all_bodies, skip_index=-1):
     """
     Calculate the net gravitational force on a body from all other bodies.
 
     Args:
         target_body (dict): The body to calculate force on
         all_bodies (list): List of all bodies in the system
+        skip_index (int): Index of target_body in all_bodies, or -1 if it is
+            not part of the list (such as the rock)
 
     Returns:
         dict: Net force vector (x, y, z) acting on target_body
     """
-    net_force = {"x": 0, "y": 0, "z": 0}
+    net_x = net_y = net_z = 0.0
 
-    for body in all_bodies:
-        # Skip if it's the same body
-        if body is target_body:
+    for j, body in enumerate(all_bodies):
+        # Skip the body itself
+        if j == skip_index:
             continue
 
-        # Calculate gravitational force from this body
-        force = calculate_gravitational_force(target_body, body)
+        # Calculate gravitational force from this body and add it to the net force
+        fx, fy, fz = calculate_gravitational_force(target_body, body)
+        net_x += fx
+        net_y += fy
+        net_z += fz
+
+    return {"x": net_x, "y": net_y, "z": net_z}
+
+
+def compute_all_forces(state, collisions=None):
+    """
+    Calculate the net gravitational force on every body of a state.
+
+    Forces are summed directly for small systems and approximated with a
+    Barnes-Hut octree above BARNES_HUT_THRESHOLD bodies. When a collisions
+    list is given, the direct sum also tests each pair for overlap from the
+    squared distance it already has, so no separate collision pass is needed.
+
+    Args:
+        state (BodyState): Bodies of the simulation, stored as parallel arrays
+        collisions (list): If given, filled with the colliding pairs (i, j),
+            sorted, as returned by check_all_collisions
+
+    Returns:
+        tuple: Lists (fx, fy, fz) of force components, indexed like the state
+    """
+    n = len(state)
+    xs, ys, zs, masses, radii = state.x, state.y, state.z, state.mass, state.radius
+    fx = [0.0] * n
+    fy = [0.0] * n
+    fz = [0.0] * n
+
+    if n > BARNES_HUT_THRESHOLD:
+        tree = build_octree(xs, ys, zs, masses)
+        for i in range(n):
+            fx[i], fy[i], fz[i] = bh_force(i, tree, xs, ys, zs, masses, G, BARNES_HUT_THETA)
+        # The tree walk never sees all pairs: use the uniform grid instead
+        if collisions is not None:
+            collisions.extend(uniform_grid_pairs(xs, ys, zs, radii))
+        return fx, fy, fz
+
+    check = collisions is not None
+
+    # Each pair is evaluated once: by Newton's third law, F_ji = -F_ij
+    for i in range(n):
+        xi, yi, zi, ri = xs[i], ys[i], zs[i], radii[i]
+        g_mi = G * masses[i]
+        sum_x, sum_y, sum_z = fx[i], fy[i], fz[i]
+
+        for j in range(i + 1, n):
+            dx = xs[j] - xi
+            dy = ys[j] - yi
+            dz = zs[j] - zi
+            r2 = dx * dx + dy * dy + dz * dz
+
+            if check:
+                radius_sum = ri + radii[j]
+                if r2 <= radius_sum * radius_sum:
+                    collisions.append((i, j))
+
+            # Avoid division by zero
+            if r2 == 0:
+                continue
+
+            # F = G*mi*mj * r / |r|^3, with a single pow
+            k = g_mi * masses[j] * r2 ** -1.5
+            kx = dx * k
+            ky = dy * k
+            kz = dz * k
+            sum_x += kx
+            sum_y += ky
+            sum_z += kz
+            fx[j] -= kx
+            fy[j] -= ky
+            fz[j] -= kz
+
+        fx[i] = sum_x
+        fy[i] = sum_y
+        fz[i] = sum_z
+
+    return fx, fy, fz
+
+
+def apply_point_mass_forces(state, px, py, pz, mass, forces, radius=0.0, collisions=None):
+    """
+    Calculate the gravitational interaction between a point mass and all bodies.
 
-        # Add to net force
-        net_force["x"] += force["x"]
-        net_force["y"] += force["y"]
-        net_force["z"] += force["z"]
+    The pull of the point mass on each body is added to forces in place,
+    following Newton's third law. When a collisions list is given, the
+    bodies overlapping a sphere of the given radius around the point mass
+    are collected in the same pass.
 
-    return net_force
+    Args:
+        state (BodyState): Bodies of the simulation
+        px, py, pz (float): Position of the point mass
+        mass (float): Mass of the point mass
+        forces (tuple): Lists (fx, fy, fz) returned by compute_all_forces
+        radius (float): Radius of the point mass, for the collision test
+        collisions (list): If given, filled with the indices of the colliding
+            bodies, in increasing order
+
+    Returns:
+        tuple: Net force vector (fx, fy, fz) acting on the point mass
+    """
+    fx, fy, fz = forces
+    xs, ys, zs, masses, radii = state.x, state.y, state.z, state.mass, state.radius
+    g_mass = G * mass
+    sum_x = sum_y = sum_z = 0.0
+    check = collisions is not None
+
+    for i in range(len(state)):
+        dx = xs[i] - px
+        dy = ys[i] - py
+        dz = zs[i] - pz
+        r2 = dx * dx + dy * dy + dz * dz
+
+        if check:
+            radius_sum = radius + radii[i]
+            if r2 <= radius_sum * radius_sum:
+                collisions.append(i)
+
+        # Avoid division by zero
+        if r2 == 0:
+            continue
+
+        k = g_mass * masses[i] * r2 ** -1.5
+        sum_x += dx * k
+        sum_y += dy * k
+        sum_z += dz * k
+        fx[i] -= dx * k
+        fy[i] -= dy * k
+        fz[i] -= dz * k
+
+    return sum_x, sum_y, sum_z
 
 
 def calculate_acceleration(force, mass):
@@ -161,6 +282,42 @@ def update_position(body, delta_time):
     return new_position
 
 
+def drift_bodies(state, delta_time):
+    """
+    Move every body of a state along its current velocity (p = p0 + v*t).
+
+    Args:
+        state (BodyState): Bodies of the simulation, updated in place
+        delta_time (float): Time step in seconds
+    """
+    xs, ys, zs = state.x, state.y, state.z
+    vxs, vys, vzs = state.vx, state.vy, state.vz
+
+    for i in range(len(state)):
+        xs[i] += vxs[i] * delta_time
+        ys[i] += vys[i] * delta_time
+        zs[i] += vzs[i] * delta_time
+
+
+def kick_bodies(state, forces, delta_time):
+    """
+    Apply forces to the velocity of every body of a state (v = v0 + F/m*t).
+
+    Args:
+        state (BodyState): Bodies of the simulation, updated in place
+        forces (tuple): Lists (fx, fy, fz) of force components
+        delta_time (float): Time step in seconds
+    """
+    fx, fy, fz = forces
+    vxs, vys, vzs, masses = state.vx, state.vy, state.vz, state.mass
+
+    for i in range(len(state)):
+        mass = masses[i]
+        vxs[i] += fx[i] / mass * delta_time
+        vys[i] += fy[i] / mass * delta_time
+        vzs[i] += fz[i] / mass * delta_time
+
+
 def merge_bodies(body1, body2):
     """
     Merge two colliding bodies according to project rules.
@@ -176,25 +333,17 @@ def merge_bodies(body1, body2):
     new_mass = body1["mass"] + body2["mass"]
 
     # Calculate total volume from both bodies
-    from src.core.utils import calculate_volume_sphere, calculate_radius_from_volume
     volume1 = calculate_volume_sphere(body1["radius"])
     volume2 = calculate_volume_sphere(body2["radius"])
     new_volume = volume1 + volume2
     new_radius = calculate_radius_from_volume(new_volume)
 
     # Calculate new position (mean of positions)
-    new_position = {
-        "x": (body1["position"]["x"] + body2["position"]["x"]) / 2,
-        "y": (body1["position"]["y"] + body2["position"]["y"]) / 2,
-        "z": (body1["position"]["z"] + body2["position"]["z"]) / 2
-    }
+    new_position = average_position([body1["position"], body2["position"]])
 
     # Calculate new velocity (weighted by mass)
-    new_velocity = {
-        "x": (body1["direction"]["x"] * body1["mass"] + body2["direction"]["x"] * body2["mass"]) / new_mass,
-        "y": (body1["direction"]["y"] * body1["mass"] + body2["direction"]["y"] * body2["mass"]) / new_mass,
-        "z": (body1["direction"]["z"] * body1["mass"] + body2["direction"]["z"] * body2["mass"]) / new_mass
-    }
+    new_velocity = weighted_average_vector([body1["direction"], body2["direction"]],
+                                           [body1["mass"], body2["mass"]])
 
     # Determine new name (concatenation in ASCII order)
     name1 = body1["name"]
@@ -232,8 +381,8 @@ def is_collision_with_rock(rock_position, rock_radius, body):
     Returns:
         bool: True if collision occurs, False otherwise
     """
-    distance = calculate_distance(rock_position, body["position"])
-    return distance <= (rock_radius + body["radius"])
+    radius_sum = rock_radius + body["radius"]
+    return distance_squared(rock_position, body["position"]) <= radius_sum * radius_sum
 
 
 def check_all_collisions(bodies):
@@ -250,14 +399,52 @@ def check_all_collisions(bodies):
 
     for i in range(len(bodies)):
         for j in range(i + 1, len(bodies)):
-            body1 = bodies[i]
-            body2 = bodies[j]
+            pos1 = bodies[i]["position"]
+            pos2 = bodies[j]["position"]
+            dx = pos2["x"] - pos1["x"]
+            dy = pos2["y"] - pos1["y"]
+            dz = pos2["z"] - pos1["z"]
+
+            # Check if distance is less than sum of radii (compared squared)
+            radius_sum = bodies[i]["radius"] + bodies[j]["radius"]
+            if dx * dx + dy * dy + dz * dz <= radius_sum * radius_sum:
+                collisions.append((i, j))
 
-            # Calculate distance between bodies
-            distance = calculate_distance(body1["position"], body2["position"])
+    return collisions
 
-            # Check if distance is less than sum of radii
-            if distance <= (body1["radius"] + body2["radius"]):
-                collisions.append((i, j))
 
-    return collisions
\ No newline at end of file
+def group_collisions(collisions):
+    """
+    Group colliding bodies into connected sets (union-find).
+
+    Chained collisions such as A-B and B-C end up in the same group.
+
+    Args:
+        collisions (list): Collision pairs as tuples (i, j)
+
+    Returns:
+        list: Sorted lists of body indices, one per group, ordered by first index
+    """
+    parent = {}
+
+    def find(i):
+        root = i
+        while parent[root] != root:
+            root = parent[root]
+        # Path compression
+        while parent[i] != root:
+            parent[i], i = root, parent[i]
+        return root
+
+    for i, j in collisions:
+        parent.setdefault(i, i)
+        parent.setdefault(j, j)
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    groups = {}
+    for i in parent:
+        groups.setdefault(find(i), []).append(i)
+
+    return sorted(sorted(group) for group in groups.values())
\ No newline at end of file
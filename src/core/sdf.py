@@ -6,7 +6,15 @@ Used in local mode for ray marching and can be useful for collision detection in
 """
 
 import math
-from src.core.utils import vector_subtract, vector_magnitude, vector_dot_product
+from src.core.utils import vsub3, vmag3, vnorm3
+
+# Ray marching result codes
+INTERSECTION = 0
+OUT_OF_SCENE = 1
+TIME_OUT = 2
+
+# Messages for each ray marching result code
+RESULT_MESSAGES = ("Intersection", "Out of scene", "Time out")
 
 
 def sphere_sdf(point, sphere):
@@ -24,8 +32,8 @@ def sphere_sdf(point, sphere):
     radius = sphere["radius"]
 
     # Calculate distance from point to center of sphere
-    diff = vector_subtract(point, center)
-    distance = vector_magnitude(diff)
+    distance = vmag3(*vsub3(point["x"], point["y"], point["z"],
+                            center["x"], center["y"], center["z"]))
 
     # Return signed distance (negative inside, positive outside)
     return distance - radius
@@ -48,7 +56,7 @@ def cylinder_sdf(point, cylinder):
     # Compute distance in the xy-plane
     dx = point["x"] - center["x"]
     dy = point["y"] - center["y"]
-    distance_xy = math.sqrt(dx**2 + dy**2) - radius
+    distance_xy = math.sqrt(dx * dx + dy * dy) - radius
 
     # If height is provided, check bounds along z-axis
     if "height" in cylinder:
@@ -61,7 +69,7 @@ def cylinder_sdf(point, cylinder):
             # Outside height bounds
             if distance_xy > 0:
                 # Outside radius bounds
-                return math.sqrt(distance_xy**2 + distance_z**2)
+                return math.sqrt(distance_xy * distance_xy + distance_z * distance_z)
             else:
                 # Inside radius bounds but outside height bounds
                 return distance_z
@@ -96,17 +104,16 @@ def box_sdf(point, box):
     dy = abs(point["y"] - center["y"]) - half_sides["y"]
     dz = abs(point["z"] - center["z"]) - half_sides["z"]
 
-    # Outside distance
-    outside_dist = math.sqrt(
-        max(0, dx)**2 +
-        max(0, dy)**2 +
-        max(0, dz)**2
-    )
-
-    # Inside distance
-    inside_dist = min(max(dx, dy, dz), 0)
+    # Inside distance: no square root needed when the point is in the box
+    inside_dist = max(dx, dy, dz)
+    if inside_dist <= 0:
+        return inside_dist
 
-    return outside_dist + inside_dist
+    # Outside distance
+    ox = max(0, dx)
+    oy = max(0, dy)
+    oz = max(0, dz)
+    return math.sqrt(ox * ox + oy * oy + oz * oz)
 
 
 def torus_sdf(point, torus):
@@ -130,44 +137,150 @@ def torus_sdf(point, torus):
     pz = point["z"] - center["z"]
 
     # Project to xz-plane
-    q_xz = math.sqrt(px**2 + py**2) - inner_radius
+    q_xz = math.sqrt(px * px + py * py) - inner_radius
 
     # Calculate distance
-    return math.sqrt(q_xz**2 + pz**2) - outer_radius
+    return math.sqrt(q_xz * q_xz + pz * pz) - outer_radius
 
 
-def min_sdf(point, bodies):
+def pack_scene(bodies):
     """
-    Calculate the minimum SDF for a point against all bodies.
+    Group the bodies of a scene by type, with their parameters as flat tuples.
+
+    Done once per scene so the ray marching loop never has to look up
+    nested dictionaries or dispatch on the body type.
 
     Args:
-        point (dict): Point coordinates (x, y, z)
         bodies (list): List of all bodies in the scene
 
     Returns:
-        tuple: (minimum distance, index of closest body)
+        dict: Lists of tuples keyed by type, each tuple starting with the body index
+            - "sphere": (index, cx, cy, cz, radius)
+            - "cylinder": (index, cx, cy, cz, radius, half_height or None)
+            - "box": (index, cx, cy, cz, half_x, half_y, half_z)
+            - "torus": (index, cx, cy, cz, inner_radius, outer_radius)
     """
-    min_dist = float('inf')
-    min_index = -1
+    scene = {"sphere": [], "cylinder": [], "box": [], "torus": []}
 
     for i, body in enumerate(bodies):
-        distance = None
         body_type = body["type"]
+        center = body["position"]
+        cx, cy, cz = center["x"], center["y"], center["z"]
 
         if body_type == "sphere":
-            distance = sphere_sdf(point, body)
+            scene["sphere"].append((i, cx, cy, cz, body["radius"]))
         elif body_type == "cylinder":
-            distance = cylinder_sdf(point, body)
+            half_height = body["height"] / 2 if "height" in body else None
+            scene["cylinder"].append((i, cx, cy, cz, body["radius"], half_height))
         elif body_type == "box":
-            distance = box_sdf(point, body)
+            sides = body["sides"]
+            scene["box"].append((i, cx, cy, cz, sides["x"] / 2, sides["y"] / 2, sides["z"] / 2))
         elif body_type == "torus":
-            distance = torus_sdf(point, body)
+            scene["torus"].append((i, cx, cy, cz, body["inner_radius"], body["outer_radius"]))
+
+    return scene
+
+
+def format_constant(value):
+    """Format a number as a Python literal that evaluates to the same float."""
+    value = float(value)
+    if math.isfinite(value):
+        return repr(value)
+    return f"float('{value}')"
+
+
+def compile_scene(scene):
+    """
+    Generate a minimum SDF function specialized for a packed scene.
 
-        if distance is not None and distance < min_dist:
-            min_dist = distance
-            min_index = i
+    The body parameters are known once the scene is parsed, so the source
+    of a straight-line function is generated with every parameter written
+    as a literal, then compiled: no loop, tuple unpacking or type dispatch
+    is left per evaluation. Bodies are evaluated by index and only a
+    strictly smaller distance wins, so ties go to the body listed first.
 
-    return min_dist, min_index
+    Args:
+        scene (dict): Scene returned by pack_scene
+
+    Returns:
+        callable: Function (x, y, z) -> (minimum distance, index of closest body)
+    """
+    c = format_constant
+    bodies = []
+
+    for i, cx, cy, cz, radius in scene["sphere"]:
+        bodies.append((i, [
+            f"dx = x - {c(cx)}",
+            f"dy = y - {c(cy)}",
+            f"dz = z - {c(cz)}",
+            f"d = sqrt(dx * dx + dy * dy + dz * dz) - {c(radius)}"
+        ]))
+
+    for i, cx, cy, cz, radius, half_height in scene["cylinder"]:
+        lines = [
+            f"dx = x - {c(cx)}",
+            f"dy = y - {c(cy)}",
+            f"d = sqrt(dx * dx + dy * dy) - {c(radius)}"
+        ]
+        if half_height is not None:
+            lines += [
+                f"dz = abs(z - {c(cz)}) - {c(half_height)}",
+                "if dz > 0:",
+                "    d = sqrt(d * d + dz * dz) if d > 0 else dz"
+            ]
+        bodies.append((i, lines))
+
+    for i, cx, cy, cz, half_x, half_y, half_z in scene["box"]:
+        bodies.append((i, [
+            f"dx = abs(x - {c(cx)}) - {c(half_x)}",
+            f"dy = abs(y - {c(cy)}) - {c(half_y)}",
+            f"dz = abs(z - {c(cz)}) - {c(half_z)}",
+            "d = max(dx, dy, dz)",
+            "if d > 0:",
+            "    ox = max(0, dx)",
+            "    oy = max(0, dy)",
+            "    oz = max(0, dz)",
+            "    d = sqrt(ox * ox + oy * oy + oz * oz)"
+        ]))
+
+    for i, cx, cy, cz, inner_radius, outer_radius in scene["torus"]:
+        bodies.append((i, [
+            f"dx = x - {c(cx)}",
+            f"dy = y - {c(cy)}",
+            f"dz = z - {c(cz)}",
+            f"q = sqrt(dx * dx + dy * dy) - {c(inner_radius)}",
+            f"d = sqrt(q * q + dz * dz) - {c(outer_radius)}"
+        ]))
+
+    source = ["def scene_sdf(x, y, z, sqrt=math.sqrt, abs=abs, max=max, inf=math.inf):",
+              "    min_dist = inf",
+              "    min_index = -1"]
+    for i, lines in sorted(bodies, key=lambda body: body[0]):
+        source += ["    " + line for line in lines]
+        source += ["    if d < min_dist:",
+                   "        min_dist = d",
+                   f"        min_index = {i}"]
+    source.append("    return min_dist, min_index")
+
+    namespace = {"math": math}
+    exec("\n".join(source), namespace)
+    return namespace["scene_sdf"]
+
+
+def min_sdf(point, bodies):
+    """
+    Calculate the minimum SDF for a point against all bodies.
+
+    The scene is compiled on every call: loops should call compile_scene once.
+
+    Args:
+        point (dict): Point coordinates (x, y, z)
+        bodies (list): List of all bodies in the scene
+
+    Returns:
+        tuple: (minimum distance, index of closest body)
+    """
+    return compile_scene(pack_scene(bodies))(point["x"], point["y"], point["z"])
 
 
 def ray_direction(velocity):
@@ -180,69 +293,89 @@ def ray_direction(velocity):
     Returns:
         dict: Normalized direction vector
     """
-    mag = math.sqrt(velocity["x"]**2 + velocity["y"]**2 + velocity["z"]**2)
-    if mag == 0:
-        return {"x": 0, "y": 0, "z": 0}
-
-    return {
-        "x": velocity["x"] / mag,
-        "y": velocity["y"] / mag,
-        "z": velocity["z"] / mag
-    }
+    x, y, z = vnorm3(velocity["x"], velocity["y"], velocity["z"])
+    return {"x": x, "y": y, "z": z}
 
 
-def ray_march(origin, direction, bodies, max_steps=1000, min_distance=0.1, max_distance=1000.0):
+def march_scene(ox, oy, oz, dx, dy, dz, scene_sdf, max_steps, min_distance, max_distance):
     """
-    Perform ray marching from origin in given direction.
+    Ray marching loop working on scalar coordinates and a compiled scene.
+
+    An intersection (or leaving the scene) is reported the second time
+    its condition is met.
 
     Args:
-        origin (dict): Starting point (x, y, z)
-        direction (dict): Direction vector (normalized)
-        bodies (list): List of all bodies in the scene
+        ox, oy, oz (float): Starting point
+        dx, dy, dz (float): Direction vector (normalized)
+        scene_sdf (callable): Function (x, y, z) -> (distance, index) returned by compile_scene
         max_steps (int): Maximum number of steps before timing out
         min_distance (float): Distance threshold for intersection
         max_distance (float): Maximum distance to march
 
     Returns:
-        tuple: (result, steps list, hit_index)
-            - result: "Intersection", "Out of scene", or "Time out"
-            - steps: List of points visited during marching
+        tuple: (result code, hit_index, steps)
+            - result code: INTERSECTION, OUT_OF_SCENE or TIME_OUT
             - hit_index: Index of the intersected body or -1
+            - steps: List of (x, y, z) points visited during marching
     """
-    steps = []
-    total_distance = 0.0
-    current_point = origin.copy()
+    # Preallocated buffer of visited points, sliced to the used length on return
+    steps = [None] * max_steps
+    px, py, pz = ox, oy, oz
 
     tmp_iteration_far = 0
     tmp_iteration_intersection = 0
     for step in range(max_steps):
         # Calculate minimum signed distance to any object
-        dist, hit_index = min_sdf(current_point, bodies)
+        dist, hit_index = scene_sdf(px, py, pz)
 
         # Record current position
-        steps.append(current_point.copy())
+        steps[step] = (px, py, pz)
 
         # Check for intersection
         if dist <= min_distance:
             if tmp_iteration_intersection > 0:
-                return "Intersection", steps, hit_index
+                return INTERSECTION, hit_index, steps[:step + 1]
             else:
                 tmp_iteration_intersection += 1
 
         # Check if we're too far
         if dist > max_distance:
             if tmp_iteration_far > 0:
-                return "Out of scene", steps, -1
+                return OUT_OF_SCENE, -1, steps[:step + 1]
             else:
                 tmp_iteration_far += 1
 
         # Move along the ray by the safe distance
-        total_distance += dist
-        current_point = {
-            "x": current_point["x"] + direction["x"] * dist,
-            "y": current_point["y"] + direction["y"] * dist,
-            "z": current_point["z"] + direction["z"] * dist
-        }
+        px += dx * dist
+        py += dy * dist
+        pz += dz * dist
 
     # We've reached the maximum number of steps without finding anything
-    return "Time out", steps, -1
\ No newline at end of file
+    return TIME_OUT, -1, steps
+
+
+def ray_march(origin, direction, bodies, max_steps=1000, min_distance=0.1, max_distance=1000.0):
+    """
+    Perform ray marching from origin in given direction.
+
+    Args:
+        origin (dict): Starting point (x, y, z)
+        direction (dict): Direction vector (normalized)
+        bodies (list): List of all bodies in the scene
+        max_steps (int): Maximum number of steps before timing out
+        min_distance (float): Distance threshold for intersection
+        max_distance (float): Maximum distance to march
+
+    Returns:
+        tuple: (result, steps list, hit_index)
+            - result: "Intersection", "Out of scene", or "Time out"
+            - steps: List of points visited during marching
+            - hit_index: Index of the intersected body or -1
+    """
+    code, hit_index, steps = march_scene(
+        origin["x"], origin["y"], origin["z"],
+        direction["x"], direction["y"], direction["z"],
+        compile_scene(pack_scene(bodies)), max_steps, min_distance, max_distance
+    )
+    points = [{"x": x, "y": y, "z": z} for x, y, z in steps]
+    return RESULT_MESSAGES[code], points, hit_index
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+
+"""
+Body state storage for Interstonar.
+Keeps the celestial bodies of the global simulation as parallel arrays
+(structure of arrays) instead of a list of nested dictionaries.
+"""
+
+
+class BodyState:
+    """
+    Structure-of-arrays view of the celestial bodies.
+
+    Each attribute is a flat list indexed by body: coordinates (x, y, z),
+    velocity components (vx, vy, vz), mass, radius, name and goal flag.
+    """
+
+    def __init__(self):
+        self.x = []
+        self.y = []
+        self.z = []
+        self.vx = []
+        self.vy = []
+        self.vz = []
+        self.mass = []
+        self.radius = []
+        self.name = []
+        self.goal = []
+
+    @classmethod
+    def from_bodies(cls, bodies):
+        """
+        Build a state from a list of body dictionaries.
+
+        Args:
+            bodies (list): Bodies as parsed from the configuration file
+
+        Returns:
+            BodyState: New state holding a copy of the bodies' values
+        """
+        state = cls()
+        for body in bodies:
+            state.append(body)
+        return state
+
+    def __len__(self):
+        return len(self.mass)
+
+    def append(self, body):
+        """
+        Append a body given in dictionary form.
+
+        Args:
+            body (dict): Body with name, position, direction, mass and radius
+        """
+        position = body["position"]
+        direction = body["direction"]
+        self.x.append(float(position["x"]))
+        self.y.append(float(position["y"]))
+        self.z.append(float(position["z"]))
+        self.vx.append(float(direction["x"]))
+        self.vy.append(float(direction["y"]))
+        self.vz.append(float(direction["z"]))
+        self.mass.append(float(body["mass"]))
+        self.radius.append(float(body["radius"]))
+        self.name.append(body["name"])
+        self.goal.append(bool(body.get("goal", False)))
+
+    def body(self, index):
+        """
+        Get a body in dictionary form.
+
+        Args:
+            index (int): Index of the body
+
+        Returns:
+            dict: Body with name, position, direction, mass, radius (and goal)
+        """
+        body = {
+            "name": self.name[index],
+            "position": {"x": self.x[index], "y": self.y[index], "z": self.z[index]},
+            "direction": {"x": self.vx[index], "y": self.vy[index], "z": self.vz[index]},
+            "mass": self.mass[index],
+            "radius": self.radius[index]
+        }
+        if self.goal[index]:
+            body["goal"] = True
+        return body
+
+    def remove(self, indices):
+        """
+        Remove several bodies at once, keeping the order of the others.
+
+        Args:
+            indices (set): Indices of the bodies to remove
+        """
+        keep = [i for i in range(len(self)) if i not in indices]
+        for name in ("x", "y", "z", "vx", "vy", "vz", "mass", "radius", "name", "goal"):
+            column = getattr(self, name)
+            setattr(self, name, [column[i] for i in keep])
+
+    def to_bodies(self):
+        """
+        Convert the state back to a list of body dictionaries.
+
+        Returns:
+            list: Bodies in dictionary form
+        """
+        return [self.body(i) for i in range(len(self))]
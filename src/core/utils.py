@@ -6,35 +6,69 @@ Utility functions for the Interstonar project.
 
 import math
 
+try:
+    from math import cbrt
+except ImportError:
+    # math.cbrt is only available from Python 3.11
+    def cbrt(value):
+        """Calculate the cube root of a non-negative value."""
+        return value ** (1 / 3)
+
+# Sphere volume coefficient: V = 4/3 * pi * r^3
+_VOL_COEFF = (4.0 / 3.0) * math.pi
+
+# Inverse of the volume coefficient: r = cbrt(3/(4*pi) * V)
+_CBRT_SCALE = 3.0 / (4.0 * math.pi)
+
 
 def calculate_distance(pos1, pos2):
     """Calculate the Euclidean distance between two 3D points."""
     dx = pos2['x'] - pos1['x']
     dy = pos2['y'] - pos1['y']
     dz = pos2['z'] - pos1['z']
-    return math.sqrt(dx**2 + dy**2 + dz**2)
+    return math.sqrt(dx * dx + dy * dy + dz * dz)
+
+
+def distance_squared(pos1, pos2):
+    """Calculate the squared Euclidean distance between two 3D points."""
+    dx = pos2['x'] - pos1['x']
+    dy = pos2['y'] - pos1['y']
+    dz = pos2['z'] - pos1['z']
+    return dx * dx + dy * dy + dz * dz
+
+
+def vsub3(ax, ay, az, bx, by, bz):
+    """Subtract (bx, by, bz) from (ax, ay, az) without building a dict."""
+    return ax - bx, ay - by, az - bz
+
+
+def vmag3(x, y, z):
+    """Calculate the magnitude of the vector (x, y, z)."""
+    return math.sqrt(x * x + y * y + z * z)
+
+
+def vnorm3(x, y, z):
+    """Normalize the vector (x, y, z) to unit length, returned as a tuple."""
+    magnitude = math.sqrt(x * x + y * y + z * z)
+    if magnitude == 0:
+        return 0, 0, 0
+    return x / magnitude, y / magnitude, z / magnitude
 
 
 def normalize_vector(vector):
     """Normalize a 3D vector to unit length."""
-    magnitude = math.sqrt(vector['x']**2 + vector['y']**2 + vector['z']**2)
-    if magnitude == 0:
-        return {'x': 0, 'y': 0, 'z': 0}
-    return {
-        'x': vector['x'] / magnitude,
-        'y': vector['y'] / magnitude,
-        'z': vector['z'] / magnitude
-    }
+    x, y, z = vnorm3(vector['x'], vector['y'], vector['z'])
+    return {'x': x, 'y': y, 'z': z}
 
 
 def calculate_volume_sphere(radius):
     """Calculate the volume of a sphere."""
-    return (4/3) * math.pi * (radius**3)
+    return _VOL_COEFF * radius * radius * radius
 
 
 def calculate_radius_from_volume(volume):
     """Calculate radius from a sphere's volume."""
-    return math.pow((3 * volume) / (4 * math.pi), 1/3)
+    return cbrt(_CBRT_SCALE * volume)
 
 
 def vector_add(vec1, vec2):
@@ -80,12 +114,12 @@ def vector_cross_product(vec1, vec2):
 
 def vector_magnitude(vec):
     """Calculate the magnitude (length) of a 3D vector."""
-    return math.sqrt(vec['x']**2 + vec['y']**2 + vec['z']**2)
+    return vmag3(vec['x'], vec['y'], vec['z'])
 
 
 def vector_distance(vec1, vec2):
     """Calculate the distance between two points represented by vectors."""
-    return vector_magnitude(vector_subtract(vec1, vec2))
+    return vmag3(*vsub3(vec1['x'], vec1['y'], vec1['z'], vec2['x'], vec2['y'], vec2['z']))
 
 
 def vector_reflect(incident, normal):
@@ -114,19 +148,20 @@ def weighted_average_vector(vectors, weights):
     Returns:
         dict: Weighted average vector
     """
-    total_weight = sum(weights)
-    weighted_sum = {'x': 0, 'y': 0, 'z': 0}
+    total_weight = 0
+    sum_x = sum_y = sum_z = 0
 
-    for i, vec in enumerate(vectors):
-        weight = weights[i]
-        weighted_sum['x'] += vec['x'] * weight
-        weighted_sum['y'] += vec['y'] * weight
-        weighted_sum['z'] += vec['z'] * weight
+    # Single pass accumulating weights and weighted components together
+    for vec, weight in zip(vectors, weights):
+        total_weight += weight
+        sum_x += vec['x'] * weight
+        sum_y += vec['y'] * weight
+        sum_z += vec['z'] * weight
 
     return {
-        'x': weighted_sum['x'] / total_weight,
-        'y': weighted_sum['y'] / total_weight,
-        'z': weighted_sum['z'] / total_weight
+        'x': sum_x / total_weight,
+        'y': sum_y / total_weight,
+        'z': sum_z / total_weight
     }
 
 
@@ -144,9 +179,12 @@ def average_position(positions):
     if count == 0:
         return {'x': 0, 'y': 0, 'z': 0}
 
-    sum_x = sum(pos['x'] for pos in positions)
-    sum_y = sum(pos['y'] for pos in positions)
-    sum_z = sum(pos['z'] for pos in positions)
+    # Single pass over the positions for the three components
+    sum_x = sum_y = sum_z = 0
+    for pos in positions:
+        sum_x += pos['x']
+        sum_y += pos['y']
+        sum_z += pos['z']
 
     return {
         'x': sum_x / count,
@@ -167,8 +205,7 @@ def is_point_inside_sphere(point, sphere_center, radius):
     Returns:
         bool: True if the point is inside or on the sphere, False otherwise
     """
-    distance = calculate_distance(point, sphere_center)
-    return distance <= radius
+    return distance_squared(point, sphere_center) <= radius * radius
 
 
 def is_collision(obj1_pos, obj1_radius, obj2_pos, obj2_radius):
@@ -184,8 +221,8 @@ def is_collision(obj1_pos, obj1_radius, obj2_pos, obj2_radius):
     Returns:
         bool: True if the objects collide, False otherwise
     """
-    distance = calculate_distance(obj1_pos, obj2_pos)
-    return distance <= (obj1_radius + obj2_radius)
+    radius_sum = obj1_radius + obj2_radius
+    return distance_squared(obj1_pos, obj2_pos) <= radius_sum * radius_sum
 
 
 def format_vector(vector, precision=3):
@@ -6,144 +6,168 @@ Handles gravitational simulation of celestial bodies and trajectory
 of a projectile (rock) through space using Newton's laws of motion.
 """
 
-import math
-import copy
-from src.core.utils import calculate_distance, normalize_vector
-from src.core.utils import calculate_volume_sphere, calculate_radius_from_volume
-from src.core.physics import (calculate_gravitational_force, calculate_net_force,
-                             calculate_acceleration, update_velocity, update_position,
-                             merge_bodies, check_all_collisions, is_collision_with_rock)
+import sys
+from src.core.physics import (merge_bodies, compute_all_forces, apply_point_mass_forces,
+                             drift_bodies, kick_bodies, group_collisions)
+from src.core.state import BodyState
 
 # Physical constants
 G = 6.674e-11  # Gravitational constant (m^3 kg^-1 s^-2)
 
 # Simulation parameters
 DELTA_TIME = 3600  # Time step (1 hour in seconds)
+HOUR = 3600  # Unit of the simulation time printed in the output (seconds)
 MAX_STEPS = 365 * 24  # Maximum simulation time (365 days)
+OUTPUT_FLUSH_STEPS = 256  # Number of steps between two writes to stdout
 
 # Rock properties
 ROCK_MASS = 1.0  # Mass of the projectile (1kg)
 ROCK_RADIUS = 1.0  # Radius of the projectile (1m)
 
 
-def run_global_simulation(bodies, rock_position, rock_velocity):
+def run_global_simulation(bodies, rock_position, rock_velocity, delta_time=DELTA_TIME):
     """
     Run global simulation of celestial bodies and a rock using Newtonian physics.
     
-    The simulation uses Euler integration with a fixed time step to calculate
-    the trajectories of all bodies, including the rock, under gravitational forces.
-    It continues until either the rock collides with a body, or the maximum
-    simulation time is reached.
+    The simulation uses velocity-Verlet (kick-drift-kick leapfrog) integration
+    with a fixed time step: half a kick from the current forces, a full drift,
+    then half a kick from the forces at the new positions. Those forces are
+    reused for the first half kick of the next step, so forces are evaluated
+    once per step. It computes the trajectories of all bodies, including the
+    rock, under gravitational forces. It continues until either the rock
+    collides with a body, or the maximum simulation time (365 days) is reached.
 
     Args:
         bodies (list): List of bodies from the configuration
         rock_position (dict): Initial position of the rock (x, y, z)
         rock_velocity (dict): Initial velocity of the rock (x, y, z)
+        delta_time (float): Time step in seconds, the output still counting
+            the time in hours
 
     Returns:
         str: Result of simulation ("Mission success" or "Mission failure")
     """
-    # Make deep copies to avoid modifying the original data
-    bodies = copy.deepcopy(bodies)
-
-    # Create rock object
-    rock = {
-        "position": copy.deepcopy(rock_position),
-        "direction": copy.deepcopy(rock_velocity),
-        "mass": ROCK_MASS,
-        "radius": ROCK_RADIUS,
-        "name": "Rock"
-    }
-
-    # Run simulation for up to MAX_STEPS
-    for step in range(1, MAX_STEPS + 1):
-        # Calculate forces on all bodies
-        # These forces will be used to update velocities after position updates
-        forces = []
-        for body in bodies:
-            # Get all bodies that affect the current body (excluding itself)
-            other_bodies = [b for b in bodies if b != body]
-            
-            # Include rock's gravitational effect on celestial bodies
-            other_bodies.append(rock)
-            
-            # Calculate net gravitational force on current body
-            force = calculate_net_force(body, other_bodies)
-            forces.append(force)
-
-        # Calculate gravitational force on the rock from all celestial bodies
-        rock_force = calculate_net_force(rock, bodies)
-
-        # Update positions using current velocities
-        for body in bodies:
-            body["position"] = update_position(body, DELTA_TIME)
-        
-        # Update rock position
-        rock["position"] = update_position(rock, DELTA_TIME)
-
-        # Display rock position at current time step
-        print(f"At time t = {step}: rock is ({rock['position']['x']:.3f}, {rock['position']['y']:.3f}, {rock['position']['z']:.3f})")
-
-        # Check for collisions between rock and celestial bodies
-        collision_result, body_index = check_rock_collisions(bodies, rock)
-        if collision_result:
-            collided_body = bodies[body_index]
-            print(f"Collision between rock and {collided_body['name']}")
-
-            # Mission succeeds if the rock collides with a goal body
-            if "goal" in collided_body and collided_body["goal"]:
-                return "Mission success"
-            else:
-                return "Mission failure"
-
-        # Check for and handle collisions between celestial bodies
-        body_collisions = check_all_collisions(bodies)
-        if body_collisions:
-            # Process collisions in reverse index order to avoid invalidating indices
-            body_collisions.sort(reverse=True, key=lambda x: x[0])
-
-            for i, j in body_collisions:
-                # Merge the colliding bodies according to project rules
-                merged_body = merge_bodies(bodies[i], bodies[j])
-
-                # Remove the original bodies (in correct order to maintain valid indices)
-                bodies.pop(i)
-                bodies.pop(j if j > i else j)
-
-                # Add the merged body to the simulation
-                bodies.append(merged_body)
-
-                print(f"Collision between {merged_body['name']} bodies")
-
-        # Update velocities using the calculated forces
-        for i, body in enumerate(bodies):
-            acceleration = calculate_acceleration(forces[i], body["mass"])
-            body["direction"] = update_velocity(body, acceleration, DELTA_TIME)
-
-        # Update rock velocity
-        rock_acceleration = calculate_acceleration(rock_force, rock["mass"])
-        rock["direction"] = update_velocity(rock, rock_acceleration, DELTA_TIME)
+    # Store the bodies as parallel arrays (this also copies the original data)
+    state = BodyState.from_bodies(bodies)
+
+    # The rock is kept as scalar locals: position (rx, ry, rz), velocity (rvx, rvy, rvz)
+    rx, ry, rz = rock_position["x"], rock_position["y"], rock_position["z"]
+    rvx, rvy, rvz = rock_velocity["x"], rock_velocity["y"], rock_velocity["z"]
+
+    # Output lines are buffered and written every OUTPUT_FLUSH_STEPS steps
+    output = []
+
+    # Bind the simulation constants to locals once for the hot loop
+    dt = delta_time
+    half_dt = delta_time / 2
+    rock_half_dt = half_dt / ROCK_MASS
+    rock_radius = ROCK_RADIUS
+    flush_steps = OUTPUT_FLUSH_STEPS
+    max_steps = int(MAX_STEPS * DELTA_TIME / delta_time)
+    hours_per_step = delta_time / HOUR
+
+    # Forces on all bodies at their initial positions, including the rock's
+    # gravitational effect, and force on the rock from all celestial bodies
+    forces = compute_all_forces(state)
+    rock_fx, rock_fy, rock_fz = apply_point_mass_forces(state, rx, ry, rz, ROCK_MASS, forces)
+
+    # Run simulation for up to 365 days
+    try:
+        for step in range(1, max_steps + 1):
+            # First half kick with the forces of the current positions...
+            kick_bodies(state, forces, half_dt)
+            rvx += rock_fx * rock_half_dt
+            rvy += rock_fy * rock_half_dt
+            rvz += rock_fz * rock_half_dt
+
+            # ...full drift with the half-step velocities...
+            drift_bodies(state, dt)
+            rx += rvx * dt
+            ry += rvy * dt
+            rz += rvz * dt
+
+            # Display rock position at the elapsed time, in hours
+            output.append(f"At time t = {step * hours_per_step:g}: rock is ({rx:.3f}, {ry:.3f}, {rz:.3f})\n")
+            if step % flush_steps == 0:
+                flush_output(output)
+
+            # Forces at the new positions, testing collisions in the same pass
+            body_collisions = []
+            rock_collisions = []
+            forces = compute_all_forces(state, body_collisions)
+            rock_fx, rock_fy, rock_fz = apply_point_mass_forces(state, rx, ry, rz, ROCK_MASS, forces,
+                                                                rock_radius, rock_collisions)
+
+            # Check for collisions between rock and celestial bodies
+            if rock_collisions:
+                body_index = rock_collisions[0]
+                output.append(f"Collision between rock and {state.name[body_index]}\n")
+
+                # Mission succeeds if the rock collides with a goal body
+                if state.goal[body_index]:
+                    return "Mission success"
+                else:
+                    return "Mission failure"
+
+            # Handle collisions between celestial bodies, then redo the
+            # forces since merging changed the bodies
+            if body_collisions:
+                merge_colliding_bodies(state, body_collisions, output)
+                forces = compute_all_forces(state)
+                rock_fx, rock_fy, rock_fz = apply_point_mass_forces(state, rx, ry, rz, ROCK_MASS, forces)
+
+            # ...and second half kick with the forces of the new positions,
+            # which are kept for the first half kick of the next step
+            kick_bodies(state, forces, half_dt)
+            rvx += rock_fx * rock_half_dt
+            rvy += rock_fy * rock_half_dt
+            rvz += rock_fz * rock_half_dt
+    finally:
+        flush_output(output)
 
     # If simulation reaches MAX_STEPS without any collision with a goal
     return "Mission failure"
 
 
-def check_rock_collisions(bodies, rock):
+def flush_output(output):
     """
-    Check for collisions between the rock and any celestial body.
-    
-    A collision occurs when the distance between the centers of two bodies
-    is less than or equal to the sum of their radii.
+    Write buffered output lines to stdout in a single call and empty the buffer.
 
     Args:
-        bodies (list): List of all celestial bodies
-        rock (dict): The rock with position and radius
+        output (list): Lines to write, each ending with a newline
+    """
+    if output:
+        sys.stdout.write("".join(output))
+        output.clear()
 
-    Returns:
-        tuple: (bool, int or None) - (collided, body_index) or (False, None) if no collision
+
+def merge_colliding_bodies(state, collisions, output):
     """
-    for i, body in enumerate(bodies):
-        if is_collision_with_rock(rock["position"], rock["radius"], body):
-            return True, i
+    Merge every group of colliding bodies into a single body.
+
+    Chained collisions (A-B and B-C) are merged together. Merged bodies are
+    appended at the end of the state, after the untouched ones.
+
+    Args:
+        state (BodyState): All celestial bodies, updated in place
+        collisions (list): Collision pairs as tuples (i, j)
+        output (list): Output buffer receiving the collision messages
+    """
+    removed = set()
+    merged_bodies = []
+
+    for group in group_collisions(collisions):
+        merged_body = state.body(group[0])
+
+        for k in group[1:]:
+            # Merge the colliding bodies according to project rules
+            merged_body = merge_bodies(merged_body, state.body(k))
+            output.append(f"Collision between {merged_body['name']} bodies\n")
+
+        removed.update(group)
+        merged_bodies.append(merged_body)
 
-    return False, None
\ No newline at end of file
+    # Rebuild the state once instead of popping bodies one by one
+    state.remove(removed)
+    for body in merged_bodies:
+        state.append(body)
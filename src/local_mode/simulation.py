@@ -1,21 +1,30 @@
 #!/usr/bin/env python3
-import math
-from src.core.sdf import sphere_sdf, cylinder_sdf, box_sdf, torus_sdf, ray_march, ray_direction
+import sys
+from src.core.sdf import pack_scene, compile_scene, march_scene, RESULT_MESSAGES
+from src.core.utils import vnorm3
+
+MAX_STEPS = 1000
+MIN_DISTANCE = 0.1
+MAX_DISTANCE = 1000.0
 
 def run_local_simulation(bodies, position, velocity):
-    origin = {
-        'x': position['x'],
-        'y': position['y'],
-        'z': position['z']
-    }
+    # Generate the SDF of this scene once, before marching
+    scene_sdf = compile_scene(pack_scene(bodies))
 
     # Calculate the normalized direction vector
-    direction = ray_direction(velocity)
+    dx, dy, dz = vnorm3(velocity['x'], velocity['y'], velocity['z'])
 
-    # Call the ray_march function from the core/sdf.py
-    result, steps, hit_index = ray_march(origin, direction, bodies)
+    # March directly on scalar coordinates and the compiled scene
+    code, hit_index, steps = march_scene(
+        position['x'], position['y'], position['z'], dx, dy, dz,
+        scene_sdf, MAX_STEPS, MIN_DISTANCE, MAX_DISTANCE
+    )
 
-    for i, step in enumerate(steps[1:], 1):  # Start from index 1, not 0
-        print(f"Step {i}: ({step['x']:.2f}, {step['y']:.2f}, {step['z']:.2f})")
+    # Format every step first and write them to stdout at once
+    output = [
+        f"Step {i}: ({x:.2f}, {y:.2f}, {z:.2f})\n"
+        for i, (x, y, z) in enumerate(steps[1:], 1)  # Start from index 1, not 0
+    ]
+    sys.stdout.write("".join(output))
 
-    return result
\ No newline at end of file
+    return RESULT_MESSAGES[code]
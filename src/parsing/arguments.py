@@ -5,17 +5,19 @@ Command line argument parsing for Interstonar.
 """
 
 import sys
-from src.core.errors import ArgumentError, handle_error
+from src.core.errors import ArgumentError
 
 
 def print_help():
     """Display help message and exit."""
     print("USAGE:")
     print("  interstonar [--global | --local] CONFIG_FILE Px Py Pz Vx Vy Vz")
+    print("  interstonar --server")
     print("")
     print("DESCRIPTION:")
     print("  --global   Launch program in global scene mode.")
     print("  --local    Launch program in local scene mode.")
+    print('  --server   Serve runs as JSON lines: {"args": [...]} in, {"returncode", "stdout", "stderr"} out.')
     print("  Pi         Position coordinates of the rock (x, y, z).")
     print("  Vi         Velocity vector of the rock (x, y, z).")
     print("  CONFIG_FILE  TOML configuration file describing a scene.")
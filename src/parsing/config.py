@@ -10,7 +10,22 @@ try:
 except ImportError:
     import tomli as toml
 
-from src.core.errors import ConfigError, handle_error
+from src.core.errors import ConfigError
+
+# Required fields, in the order they are reported when missing
+GLOBAL_FIELDS = ("name", "position", "direction", "mass", "radius")
+LOCAL_FIELDS = ("position", "type")
+LOCAL_TYPE_FIELDS = {
+    "sphere": ("radius",),
+    "cylinder": ("radius",),  # Height is optional for cylinders
+    "box": ("sides",),
+    "torus": ("inner_radius", "outer_radius")
+}
+
+_GLOBAL_REQUIRED = frozenset(GLOBAL_FIELDS)
+_LOCAL_REQUIRED = frozenset(LOCAL_FIELDS)
+_LOCAL_TYPE_REQUIRED = {body_type: frozenset(fields) for body_type, fields in LOCAL_TYPE_FIELDS.items()}
+_XYZ = frozenset(("x", "y", "z"))
 
 
 def parse_config(config_file, mode):
@@ -28,7 +43,8 @@ def parse_config(config_file, mode):
         ConfigError: If the configuration file is invalid
     """
     try:
-        with open(config_file, 'rb') as f:
+        # Unbuffered: toml.load reads the whole file at once, straight from the OS
+        with open(config_file, 'rb', buffering=0) as f:
             config = toml.load(f)
     except FileNotFoundError:
         # Ensure this raises ConfigError
@@ -64,6 +80,26 @@ def parse_config(config_file, mode):
     return bodies
 
 
+def format_missing(missing, fields):
+    """
+    Format a set of missing fields in their canonical order.
+
+    Args:
+        missing (set): Names of the missing fields
+        fields (tuple): All required fields, in canonical order
+
+    Returns:
+        str: "field 'a'" or "fields 'a', 'b'"
+    """
+    names = ", ".join(f"'{field}'" for field in fields if field in missing)
+    return f"fields {names}" if len(missing) > 1 else f"field {names}"
+
+
+def is_vector(value):
+    """Check that a value is a table with x, y and z keys."""
+    return isinstance(value, dict) and value.keys() >= _XYZ
+
+
 def validate_global_bodies(bodies):
     """
     Validate bodies for global simulation mode.
@@ -80,15 +116,14 @@ def validate_global_bodies(bodies):
     has_goal = False
 
     for i, body in enumerate(bodies):
-        # Check required fields for global simulation
-        for field in ["name", "position", "direction", "mass", "radius"]:
-            if field not in body:
-                raise ConfigError(f"missing required field '{field}' for body {i+1}")
+        # Check required fields for global simulation, reporting all missing ones
+        missing = _GLOBAL_REQUIRED - body.keys()
+        if missing:
+            raise ConfigError(f"missing required {format_missing(missing, GLOBAL_FIELDS)} for body {i+1}")
 
         # Validate position and direction fields
-        for vector_field in ["position", "direction"]:
-            vector = body[vector_field]
-            if not isinstance(vector, dict) or not all(key in vector for key in ["x", "y", "z"]):
+        for vector_field in ("position", "direction"):
+            if not is_vector(body[vector_field]):
                 raise ConfigError(f"invalid {vector_field} for body {i+1}")
 
         # Check for the goal field
@@ -114,36 +149,25 @@ def validate_local_bodies(bodies):
         raise ConfigError("no bodies defined in configuration file")
 
     for i, body in enumerate(bodies):
-        # Check required fields for all local bodies
-        if "position" not in body:
-            raise ConfigError(f"missing required field 'position' for body {i+1}")
-        if "type" not in body:
-            raise ConfigError(f"missing required field 'type' for body {i+1}")
+        # Check required fields for all local bodies, reporting all missing ones
+        missing = _LOCAL_REQUIRED - body.keys()
+        if missing:
+            raise ConfigError(f"missing required {format_missing(missing, LOCAL_FIELDS)} for body {i+1}")
 
         # Validate position field
-        position = body["position"]
-        if not isinstance(position, dict) or not all(key in position for key in ["x", "y", "z"]):
+        if not is_vector(body["position"]):
             raise ConfigError(f"invalid position for body {i+1}")
 
         # Validate body-specific fields based on type
         body_type = body["type"]
-        if body_type == "sphere":
-            if "radius" not in body:
-                raise ConfigError(f"missing 'radius' for sphere body {i+1}")
-        elif body_type == "cylinder":
-            if "radius" not in body:
-                raise ConfigError(f"missing 'radius' for cylinder body {i+1}")
-            # Height is optional for cylinders
-        elif body_type == "box":
-            if "sides" not in body:
-                raise ConfigError(f"missing 'sides' for box body {i+1}")
-            sides = body["sides"]
-            if not isinstance(sides, dict) or not all(key in sides for key in ["x", "y", "z"]):
-                raise ConfigError(f"invalid sides for box body {i+1}")
-        elif body_type == "torus":
-            if "inner_radius" not in body:
-                raise ConfigError(f"missing 'inner_radius' for torus body {i+1}")
-            if "outer_radius" not in body:
-                raise ConfigError(f"missing 'outer_radius' for torus body {i+1}")
-        else:
-            raise ConfigError(f"unknown body type '{body_type}' for body {i+1}")
\ No newline at end of file
+        required = _LOCAL_TYPE_REQUIRED.get(body_type)
+        if required is None:
+            raise ConfigError(f"unknown body type '{body_type}' for body {i+1}")
+
+        missing = required - body.keys()
+        if missing:
+            fields = format_missing(missing, LOCAL_TYPE_FIELDS[body_type])
+            raise ConfigError(f"missing {fields} for {body_type} body {i+1}")
+
+        if body_type == "box" and not is_vector(body["sides"]):
+            raise ConfigError(f"invalid sides for box body {i+1}")
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+
+"""
+Configuration partagée des tests pour le programme Interstonar.
+"""
+
+import json
+import sys
+import threading
+import pytest
+import subprocess
+from pathlib import Path
+
+# Racine du dépôt
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+# Chemin vers l'exécutable Interstonar
+INTERSTONAR_PATH = REPO_DIR / 'interstonar'
+
+# Chemin vers les fichiers de configuration TOML
+TOML_DIR = REPO_DIR / 'toml'
+
+# Durée maximale d'un lancement du programme, en secondes
+RUN_TIMEOUT = 10
+
+# Rend le paquet src importable par les tests unitaires
+sys.path.insert(0, str(REPO_DIR))
+
+
+def run_interstonar(args):
+    """
+    Exécute le programme Interstonar avec les arguments spécifiés.
+
+    Args:
+        args (list): Liste des arguments pour le programme
+
+    Returns:
+        tuple: (code de retour, sortie standard, sortie d'erreur), les sorties en bytes
+
+    Raises:
+        subprocess.TimeoutExpired: Si le programme dépasse RUN_TIMEOUT secondes
+            (le processus est alors tué)
+    """
+    # Lancé via l'interpréteur courant : avec close_fds=False, subprocess
+    # peut utiliser posix_spawn au lieu de fork + exec
+    cmd = [sys.executable, str(INTERSTONAR_PATH)] + args
+    proc = subprocess.run(cmd, stdin=subprocess.DEVNULL, capture_output=True, check=False,
+                          close_fds=False, timeout=RUN_TIMEOUT)
+    return proc.returncode, proc.stdout, proc.stderr
+
+
+def run_interstonar_until(args, sentinel):
+    """
+    Exécute Interstonar en lisant sa sortie au fil de l'eau, jusqu'à une ligne attendue.
+
+    Le processus est arrêté dès qu'une ligne contient sentinel, sans attendre
+    la fin de la simulation. Son code de retour n'est donc pas significatif
+    et n'est pas renvoyé.
+
+    Args:
+        args (list): Liste des arguments pour le programme
+        sentinel (bytes): Texte attendu dans la sortie standard
+
+    Returns:
+        bytes: Sortie standard lue jusqu'à sentinel incluse
+
+    Raises:
+        subprocess.TimeoutExpired: Si sentinel n'apparaît pas en RUN_TIMEOUT secondes
+            (le processus est alors tué)
+    """
+    cmd = [sys.executable, str(INTERSTONAR_PATH)] + args
+    proc = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                            close_fds=False)
+    out = bytearray()
+
+    # readline bloque : le processus est tué à l'échéance, ce qui ferme le tube
+    expired = threading.Event()
+
+    def expire():
+        expired.set()
+        proc.kill()
+
+    deadline = threading.Timer(RUN_TIMEOUT, expire)
+    deadline.start()
+    try:
+        for line in iter(proc.stdout.readline, b""):
+            out.extend(line)
+            if sentinel in line:
+                proc.terminate()
+                break
+    finally:
+        deadline.cancel()
+        proc.stdout.close()
+        proc.wait()
+
+    if expired.is_set():
+        raise subprocess.TimeoutExpired(cmd, RUN_TIMEOUT, output=bytes(out))
+
+    return bytes(out)
+
+
+@pytest.fixture(scope="session")
+def toml_dir():
+    """
+    Dossier des fichiers de configuration TOML.
+
+    Returns:
+        Path: Chemin absolu vers le dossier toml du dépôt
+    """
+    return TOML_DIR
+
+
+@pytest.fixture(scope="session")
+def interstonar_path():
+    """
+    Exécutable du programme Interstonar.
+
+    Returns:
+        Path: Chemin absolu vers le script interstonar du dépôt
+    """
+    return INTERSTONAR_PATH
+
+
+@pytest.fixture(scope="session")
+def interstonar_until():
+    """
+    Exécuteur qui arrête Interstonar dès qu'une ligne attendue apparaît.
+
+    Returns:
+        callable: Fonction (args, sentinel) -> sortie standard en bytes
+    """
+    return run_interstonar_until
+
+
+@pytest.fixture(scope="session")
+def interstonar_process():
+    """
+    Exécuteur qui lance un nouveau processus Interstonar à chaque appel.
+
+    Returns:
+        callable: Fonction args -> (code de retour, sortie standard, sortie d'erreur) en bytes
+    """
+    return run_interstonar
+
+
+@pytest.fixture(scope="session")
+def interstonar_server():
+    """
+    Processus Interstonar unique, lancé en mode --server pour toute la session.
+
+    Chaque appel envoie une ligne JSON avec les arguments et lit la ligne
+    de réponse : un seul interpréteur est démarré pour tous les scénarios.
+
+    Returns:
+        callable: Fonction args -> (code de retour, sortie standard, sortie d'erreur) en bytes
+    """
+    proc = subprocess.Popen(
+        [sys.executable, str(INTERSTONAR_PATH), '--server'],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        close_fds=False
+    )
+
+    def send(args):
+        proc.stdin.write(json.dumps({"args": list(args)}).encode() + b"\n")
+        proc.stdin.flush()
+        response = json.loads(proc.stdout.readline())
+        return response["returncode"], response["stdout"].encode(), response["stderr"].encode()
+
+    yield send
+
+    proc.stdin.close()
+    proc.stdout.close()
+    proc.wait()
+
+
+@pytest.fixture(scope="session")
+def interstonar_runner(interstonar_server):
+    """
+    Exécuteur d'Interstonar partagé par toute la session de tests.
+
+    Les scénarios passent par le serveur de la session, et les résultats
+    sont mis en cache par liste d'arguments : des tests qui lancent le
+    même scénario réutilisent la sortie du premier lancement.
+
+    Returns:
+        callable: Fonction args -> (code de retour, sortie standard, sortie d'erreur) en bytes
+    """
+    cache = {}
+
+    def run(args):
+        key = tuple(args)
+        if key not in cache:
+            cache[key] = interstonar_server(args)
+        return cache[key]
+
+    return run
@@ -5,212 +5,291 @@ Tests fonctionnels pour le programme Interstonar.
 Ces tests exécutent le programme complet et vérifient le comportement et la sortie.
 """
 
-import os
+import json
 import re
+import sys
 import pytest
 import subprocess
-from pathlib import Path
 
-# Chemin vers l'exécutable Interstonar
-INTERSTONAR_PATH = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) / 'interstonar'
+# Position de la roche à t=1 dans la sortie du mode global
+T1_POSITION_RE = re.compile(rb"At time t = 1: rock is \(([^)]+)\)")
 
-# Chemin vers les fichiers de configuration TOML
-TOML_DIR = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) / 'toml'
+# Étapes du mode local : numéro et coordonnées
+STEP_RE = re.compile(rb"Step (\d+): \(([^)]+)\)")
 
+# Description des corps de local_scene_example.toml affichée au lancement
+LOCAL_SCENE_DESCRIPTION = [
+    (b"Sphere of radius 1.00 at position (0.00, 0.00, 0.00)", "Message de la sphère non affiché"),
+    (b"Cylinder of radius 1.00 and height 100.00 at position (0.00, 0.00, 0.00)", "Message du cylindre non affiché"),
+    (b"Box of dimensions (10.00, 10.00, 10.00) at position (0.00, 0.00, 0.00)", "Message de la box non affiché"),
+    (b"Torus of inner radius 3.00 and outer radius 1.00 at position (0.00, 0.00, 0.00)", "Message du torus non affiché"),
+]
 
-def run_interstonar(args):
+
+def parse_steps(stdout):
     """
-    Exécute le programme Interstonar avec les arguments spécifiés.
+    Extrait en une passe les étapes affichées par le mode local.
 
     Args:
-        args (list): Liste des arguments pour le programme
+        stdout (bytes): Sortie standard du programme
 
     Returns:
-        tuple: (code de retour, sortie standard, sortie d'erreur)
+        dict: Numéro d'étape -> coordonnées telles qu'affichées (bytes)
     """
-    cmd = [str(INTERSTONAR_PATH)] + args
-    proc = subprocess.Popen(
-        cmd,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        universal_newlines=True
-    )
-    stdout, stderr = proc.communicate()
-    return proc.returncode, stdout, stderr
+    return {int(match.group(1)): match.group(2) for match in STEP_RE.finditer(stdout)}
+
+
+def assert_local_scene_described(stdout):
+    """Vérifie que chaque corps de local_scene_example.toml est décrit dans la sortie."""
+    for needle, message in LOCAL_SCENE_DESCRIPTION:
+        assert needle in stdout, message
 
 
-def test_global_success_case():
+def test_global_success_case(interstonar_runner, toml_dir):
     """Test du cas où la roche atteint un objectif (mission réussie)."""
     args = [
         '--global',
-        str(TOML_DIR / 'global_scene_example.toml'),
+        str(toml_dir / 'global_scene_example.toml'),
         '1', '2', '3', '4', '5', '6'
     ]
 
-    returncode, stdout, stderr = run_interstonar(args)
+    returncode, stdout, stderr = interstonar_runner(args)
 
     # Vérification du code de retour
     assert returncode == 0, f"Le programme a retourné le code {returncode} au lieu de 0"
 
     # Vérification que la sortie contient les messages attendus
-    assert "At time t = 1:" in stdout, "Position à t=1 non affichée"
-    assert "Collision between rock and Sun" in stdout, "Message de collision non affiché"
-    assert "Mission success" in stdout, "Message de succès non affiché"
+    assert b"At time t = 1:" in stdout, "Position à t=1 non affichée"
+    assert b"Collision between rock and Sun" in stdout, "Message de collision non affiché"
+    assert b"Mission success" in stdout, "Message de succès non affiché"
 
     # Vérification que la position à t=1 est bien présente, sans vérifier les valeurs exactes
     # Les valeurs peuvent changer avec des modifications de l'implémentation
-    t1_match = re.search(r"At time t = 1: rock is \(([^)]+)\)", stdout)
+    t1_match = T1_POSITION_RE.search(stdout)
     assert t1_match, "Format de position à t=1 incorrect"
 
     # Analyse des coordonnées à t=1
-    coords = t1_match.group(1).split(", ")
+    coords = t1_match.group(1).split(b", ")
     assert len(coords) == 3, "Nombre incorrect de coordonnées"
 
 
-def test_global_failure_case():
+def test_global_chain_merge_case(interstonar_runner, toml_dir):
+    """Test de la fusion en chaîne de corps qui se chevauchent (A-B et B-C)."""
+    args = [
+        '--global',
+        str(toml_dir / 'chain_merge_scene.toml'),
+        '-1e11', '0', '0', '0', '0', '0'
+    ]
+
+    returncode, stdout, stderr = interstonar_runner(args)
+
+    # Vérification du code de retour
+    assert returncode == 0, f"Le programme a retourné le code {returncode} au lieu de 0"
+
+    # A et C ne se touchent pas, mais fusionnent tous deux avec B
+    assert b"Collision between AB bodies" in stdout, "Fusion de A et B non affichée"
+    assert b"Collision between ABC bodies" in stdout, "Fusion en chaîne avec C non affichée"
+
+
+def test_global_failure_case(interstonar_runner, toml_dir):
     """Test du cas où la roche frappe un corps qui n'est pas un objectif (mission échouée)."""
     args = [
         '--global',
-        str(TOML_DIR / 'global_scene_example2.toml'),  # Sun n'est pas un objectif dans ce fichier
+        str(toml_dir / 'global_scene_example2.toml'),  # Sun n'est pas un objectif dans ce fichier
         '1', '2', '3', '4', '5', '6'
     ]
 
-    returncode, stdout, stderr = run_interstonar(args)
+    returncode, stdout, stderr = interstonar_runner(args)
 
     # Vérification du code de retour
     assert returncode == 0, f"Le programme a retourné le code {returncode} au lieu de 0"
 
     # Vérification que la sortie contient les messages attendus
-    assert "Collision between rock and Sun" in stdout, "Message de collision non affiché"
-    assert "Mission failure" in stdout, "Message d'échec non affiché"
+    assert b"Collision between rock and Sun" in stdout, "Message de collision non affiché"
+    assert b"Mission failure" in stdout, "Message d'échec non affiché"
 
 
-def test_global_timeout():
+def test_global_timeout(interstonar_until, toml_dir):
     """Test du cas où la roche ne frappe pas de corps (timeout après 365 jours)."""
     # Utilisez des coordonnées et une vitesse qui ne causeront pas de collision
     args = [
         '--global',
-        str(TOML_DIR / 'global_scene_example.toml'),
+        str(toml_dir / 'global_scene_example.toml'),
         '1e20', '1e20', '1e20',  # Position très éloignée
         '0', '0', '0'            # Vitesse nulle
     ]
 
-    # Note: Ce test peut être très long en raison du timeout de 365 jours
-    # Nous allons tester uniquement l'appel sans attendre de complétion
+    # La sortie est lue au fil de l'eau jusqu'au message d'échec ; le
+    # lancement est interrompu au bout de RUN_TIMEOUT secondes en cas de blocage
     try:
-        returncode, stdout, stderr = run_interstonar(args)
+        stdout = interstonar_until(args, b"Mission failure")
         # Si le test se termine dans un temps raisonnable, il doit signaler un échec de mission
-        assert "Mission failure" in stdout, "Message d'échec non affiché"
+        assert b"Mission failure" in stdout, "Message d'échec non affiché"
     except subprocess.TimeoutExpired:
         # Si le test est trop long, on le considère comme réussi
         pytest.skip("Test ignoré car trop long")
 
 
-def test_global_invalid_args():
-    """Test avec des arguments invalides."""
+@pytest.mark.parametrize("scene, vectors", [
     # Arguments manquants
-    args = ['--global', str(TOML_DIR / 'global_scene_example.toml')]
-
-    returncode, stdout, stderr = run_interstonar(args)
+    ('global_scene_example.toml', []),
+    # Fichier inexistant
+    ('fichier_inexistant.toml', ['1', '2', '3', '4', '5', '6']),
+], ids=["invalid_args", "invalid_config"])
+def test_global_error_exit(interstonar_runner, toml_dir, scene, vectors):
+    """Test avec des arguments ou un fichier de configuration invalides."""
+    args = ['--global', str(toml_dir / scene)] + vectors
+    returncode, stdout, stderr = interstonar_runner(args)
 
     # Vérification du code de retour (doit être 84 pour une erreur)
     assert returncode == 84, f"Le programme a retourné le code {returncode} au lieu de 84"
 
     # Vérification que la sortie d'erreur contient un message d'erreur
-    assert "Error" in stderr, "Message d'erreur non affiché"
+    assert b"Error" in stderr, "Message d'erreur non affiché"
 
 
-def test_global_invalid_config():
-    """Test avec un fichier de configuration invalide."""
-    # Fichier inexistant
-    args = [
-        '--global',
-        'fichier_inexistant.toml',
-        '1', '2', '3', '4', '5', '6'
-    ]
+# Position et vitesse de la roche dans local_scene_example.toml
+LOCAL_SUCCESS_VECTORS = ['10', '0', '35', '-1', '0', '-2']
+LOCAL_OUT_OF_SCENE_VECTORS = ['10', '0', '35', '-1', '-1', '-20']
 
-    returncode, stdout, stderr = run_interstonar(args)
 
-    # Vérification du code de retour (doit être 84 pour une erreur)
-    assert returncode == 84, f"Le programme a retourné le code {returncode} au lieu de 84"
+@pytest.fixture(scope="module")
+def local_success_output(interstonar_runner, toml_dir):
+    """Sortie du cas où la roche atteint un corps de la scène locale, lancé une seule fois."""
+    return interstonar_runner(['--local', str(toml_dir / 'local_scene_example.toml')] + LOCAL_SUCCESS_VECTORS)
 
-    # Vérification que la sortie d'erreur contient un message d'erreur
-    assert "Error" in stderr, "Message d'erreur non affiché"
 
+@pytest.fixture(scope="module")
+def local_out_of_scene_output(interstonar_runner, toml_dir):
+    """Sortie du cas où la roche sort de la scène locale, lancé une seule fois."""
+    return interstonar_runner(['--local', str(toml_dir / 'local_scene_example.toml')] + LOCAL_OUT_OF_SCENE_VECTORS)
 
-def test_local_success_case():
-    args = [
-        '--local',
-        str(TOML_DIR / 'local_scene_example.toml'),
-        '10', '0', '35', '-1', '0', '-2'
-    ]
 
-    returncode, stdout, stderr = run_interstonar(args)
+@pytest.fixture(scope="module")
+def local_success_steps(local_success_output):
+    """Étapes du cas où la roche atteint un corps de la scène locale."""
+    return parse_steps(local_success_output[1])
+
+
+@pytest.fixture(scope="module")
+def local_out_of_scene_steps(local_out_of_scene_output):
+    """Étapes du cas où la roche sort de la scène locale."""
+    return parse_steps(local_out_of_scene_output[1])
+
+
+def test_local_success_case(local_success_output):
+    """Test du cas où la roche atteint un corps de la scène locale."""
+    returncode, stdout, stderr = local_success_output
 
     # Vérification du code de retour
     assert returncode == 0, f"Le programme a retourné le code {returncode} au lieu de 0"
 
     # Vérification que la sortie contient les messages attendus
-    assert "Rock thrown at the point (10.00, 0.00, 35.00) and parallel to the vector (-1.00, 0.00, -2.00)" in stdout, "Message de lancement de la roche non affiché"
-    assert "Sphere of radius 1.00 at position (0.00, 0.00, 0.00)" in stdout, "Message de la sphère non affiché"
-    assert "Cylinder of radius 1.00 and height 100.00 at position (0.00, 0.00, 0.00)" in stdout, "Message du cylindre non affiché"
-    assert "Box of dimensions (10.00, 10.00, 10.00) at position (0.00, 0.00, 0.00)" in stdout, "Message de la box non affiché"
-    assert "Torus of inner radius 3.00 and outer radius 1.00 at position (0.00, 0.00, 0.00)" in stdout, "Message du torus non affiché"
-
-    # Vérification des étapes intermédiaires et du résultat final
-    assert "Step 1: (5.98, 0.00, 26.95)" in stdout, "Étape 1 non affichée ou incorrecte"
-    assert "Step 2: (3.75, 0.00, 22.50)" in stdout, "Étape 2 non affichée ou incorrecte"
-    assert "Step 3: (2.52, 0.00, 20.04)" in stdout, "Étape 3 non affichée ou incorrecte"
-    assert "Step 4: (1.84, 0.00, 18.68)" in stdout, "Étape 4 non affichée ou incorrecte"
-    assert "Step 5: (1.46, 0.00, 17.93)" in stdout, "Étape 5 non affichée ou incorrecte"
-    assert "Step 6: (1.26, 0.00, 17.51)" in stdout, "Étape 6 non affichée ou incorrecte"
-    assert "Step 7: (1.14, 0.00, 17.28)" in stdout, "Étape 7 non affichée ou incorrecte"
-    assert "Step 8: (1.08, 0.00, 17.16)" in stdout, "Étape 8 non affichée ou incorrecte"
-    assert "Step 9: (1.04, 0.00, 17.09)" in stdout, "Étape 9 non affichée ou incorrecte"
-    assert "Result: Intersection" in stdout, "Résultat d'intersection non affiché ou incorrect"
-
-def test_local_out_of_scene_case():
-    """Test du cas où la roche sort de la scène."""
-    args = [
-        '--local',
-        str(TOML_DIR / 'local_scene_example.toml'),
-        '10', '0', '35', '-1', '-1', '-20'
-    ]
+    assert b"Rock thrown at the point (10.00, 0.00, 35.00) and parallel to the vector (-1.00, 0.00, -2.00)" in stdout, "Message de lancement de la roche non affiché"
+    assert_local_scene_described(stdout)
+
+
+@pytest.mark.parametrize("step, coords", [
+    (1, b"5.98, 0.00, 26.95"),
+    (2, b"3.75, 0.00, 22.50"),
+    (3, b"2.52, 0.00, 20.04"),
+    (4, b"1.84, 0.00, 18.68"),
+    (5, b"1.46, 0.00, 17.93"),
+    (6, b"1.26, 0.00, 17.51"),
+    (7, b"1.14, 0.00, 17.28"),
+    (8, b"1.08, 0.00, 17.16"),
+    (9, b"1.04, 0.00, 17.09"),
+])
+def test_local_success_steps(local_success_steps, step, coords):
+    """Vérification des étapes intermédiaires."""
+    assert local_success_steps.get(step) == coords, \
+        f"Étape {step} : {coords} attendu, {local_success_steps.get(step)} obtenu"
+
+
+def test_local_success_result(local_success_output):
+    """Vérification du résultat final."""
+    assert b"Result: Intersection" in local_success_output[1], "Résultat d'intersection non affiché ou incorrect"
 
-    returncode, stdout, stderr = run_interstonar(args)
+
+def test_local_out_of_scene_case(local_out_of_scene_output):
+    """Test du cas où la roche sort de la scène."""
+    returncode, stdout, stderr = local_out_of_scene_output
 
     # Vérification du code de retour
     assert returncode == 0, f"Le programme a retourné le code {returncode} au lieu de 0"
 
     # Vérification que la sortie contient les messages attendus
-    assert "Rock thrown at the point (10.00, 0.00, 35.00) and parallel to the vector (-1.00, -1.00, -20.00)" in stdout, "Message de lancement de la roche non affiché"
-    assert "Sphere of radius 1.00 at position (0.00, 0.00, 0.00)" in stdout, "Message de la sphère non affiché"
-    assert "Cylinder of radius 1.00 and height 100.00 at position (0.00, 0.00, 0.00)" in stdout, "Message du cylindre non affiché"
-    assert "Box of dimensions (10.00, 10.00, 10.00) at position (0.00, 0.00, 0.00)" in stdout, "Message de la box non affiché"
-    assert "Torus of inner radius 3.00 and outer radius 1.00 at position (0.00, 0.00, 0.00)" in stdout, "Message du torus non affiché"
-
-    # Vérification des étapes intermédiaires et du résultat final
-    assert "Step 1: (9.55, -0.45, 26.02)" in stdout, "Étape 1 non affichée ou incorrecte"
-    assert "Step 10: (7.19, -2.81, -21.27)" in stdout, "Étape 10 non affichée ou incorrecte"
-    assert "Step 20: (-3.28, -13.28, -230.64)" in stdout, "Étape 20 non affichée ou incorrecte"
-    assert "Step 24: (-138.72, -148.72, -2939.50)" in stdout, "Étape 24 non affichée ou incorrecte"
-    assert "Result: Out of scene" in stdout, "Résultat 'Out of scene' non affiché ou incorrect"
-
-def test_local_timeout_case():
+    assert b"Rock thrown at the point (10.00, 0.00, 35.00) and parallel to the vector (-1.00, -1.00, -20.00)" in stdout, "Message de lancement de la roche non affiché"
+    assert_local_scene_described(stdout)
+
+
+@pytest.mark.parametrize("step, coords", [
+    (1, b"9.55, -0.45, 26.02"),
+    (10, b"7.19, -2.81, -21.27"),
+    (20, b"-3.28, -13.28, -230.64"),
+    (24, b"-138.72, -148.72, -2939.50"),
+])
+def test_local_out_of_scene_steps(local_out_of_scene_steps, step, coords):
+    """Vérification des étapes intermédiaires."""
+    assert local_out_of_scene_steps.get(step) == coords, \
+        f"Étape {step} : {coords} attendu, {local_out_of_scene_steps.get(step)} obtenu"
+
+
+def test_local_out_of_scene_result(local_out_of_scene_output):
+    """Vérification du résultat final."""
+    assert b"Result: Out of scene" in local_out_of_scene_output[1], "Résultat 'Out of scene' non affiché ou incorrect"
+
+def test_local_timeout_case(interstonar_runner, toml_dir):
     """Test du cas où la roche ne rencontre aucun objet et atteint un timeout."""
     args = [
         '--local',
-        str(TOML_DIR / 'infinite_cylinder.toml'),
+        str(toml_dir / 'infinite_cylinder.toml'),
         '3', '-6.2', '12', '0', '0', '10.3'
     ]
 
-    returncode, stdout, stderr = run_interstonar(args)
+    returncode, stdout, stderr = interstonar_runner(args)
 
     # Vérification du code de retour
     assert returncode == 0, f"Le programme a retourné le code {returncode} au lieu de 0"
 
     # Vérification que la sortie contient le message de timeout
-    assert "Result: Time out" in stdout, "Message de timeout non affiché ou incorrect"
+    assert b"Result: Time out" in stdout, "Message de timeout non affiché ou incorrect"
+
+@pytest.mark.parametrize("mode, scene, vectors", [
+    ('--global', 'global_scene_example.toml', ['1', '2', '3', '4', '5', '6']),
+    ('--local', 'small_local_scene_example.toml', ['10', '0', '35', '-1', '0', '-2']),
+    ('--global', 'fichier_inexistant.toml', ['1', '2', '3', '4', '5', '6']),
+    ('--help', None, []),
+])
+def test_server_matches_process(interstonar_server, interstonar_process, toml_dir, mode, scene, vectors):
+    """Test que le mode --server produit la même sortie qu'un lancement direct."""
+    args = [mode] + ([str(toml_dir / scene)] if scene else []) + vectors
+    assert interstonar_server(args) == interstonar_process(args), "Sortie du serveur différente du programme"
+
+
+def test_server_survives_malformed_request(interstonar_path):
+    """Test qu'une requête invalide reçoit une erreur sans arrêter le serveur."""
+    requests = [
+        b"pas du json\n",
+        b'{"arguments": []}\n',
+        b'{"args": ["--help"]}\n',
+    ]
+    proc = subprocess.run(
+        [sys.executable, str(interstonar_path), '--server'],
+        input=b"".join(requests), capture_output=True, timeout=10
+    )
+    responses = [json.loads(line) for line in proc.stdout.splitlines()]
+
+    assert proc.returncode == 0, "Le serveur s'est arrêté sur une requête invalide"
+    assert len(responses) == len(requests), "Une requête est restée sans réponse"
+
+    # Les requêtes invalides échouent comme handle_error
+    for response in responses[:2]:
+        assert response["returncode"] == 84, "Code de retour incorrect pour une requête invalide"
+        assert response["stderr"].startswith("Error:"), "Message d'erreur non affiché"
+
+    # La requête suivante est traitée normalement
+    assert responses[2]["returncode"] == 0, "Requête valide en échec après une requête invalide"
 
 if __name__ == "__main__":
     pytest.main(["-v", __file__])
\ No newline at end of file
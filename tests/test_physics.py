@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+
+"""
+Tests des chemins accélérés du calcul des forces et des collisions.
+Barnes-Hut et la grille uniforme ne servent qu'au-delà de BARNES_HUT_THRESHOLD
+corps, un seuil que les scènes d'exemple n'atteignent jamais.
+"""
+
+import random
+import statistics
+import pytest
+
+from src.core.physics import (BARNES_HUT_THRESHOLD, compute_all_forces, calculate_net_force,
+                              check_all_collisions, group_collisions)
+from src.core.broadphase import uniform_grid_pairs
+from src.core.state import BodyState
+
+
+def random_bodies(count, seed, extent, radius):
+    """Génère des corps aléatoires reproductibles dans un cube de côté extent."""
+    rng = random.Random(seed)
+    return [
+        {
+            "name": f"B{k}",
+            "position": {axis: rng.uniform(0, extent) for axis in "xyz"},
+            "direction": {"x": 0, "y": 0, "z": 0},
+            "mass": rng.uniform(1e22, 1e25),
+            "radius": rng.uniform(0.5, 1.5) * radius,
+        }
+        for k in range(count)
+    ]
+
+
+def test_barnes_hut_forces_match_direct_sum():
+    """Test que les forces Barnes-Hut restent proches de la somme directe."""
+    bodies = random_bodies(BARNES_HUT_THRESHOLD + 88, seed=1, extent=1e12, radius=1e6)
+    fx, fy, fz = compute_all_forces(BodyState.from_bodies(bodies))
+
+    errors = []
+    for i, body in enumerate(bodies):
+        exact = calculate_net_force(body, bodies, i)
+        norm = (exact["x"] ** 2 + exact["y"] ** 2 + exact["z"] ** 2) ** 0.5
+        diff = ((fx[i] - exact["x"]) ** 2 + (fy[i] - exact["y"]) ** 2 + (fz[i] - exact["z"]) ** 2) ** 0.5
+        errors.append(diff / norm)
+
+    # L'approximation par octree tolère une petite erreur relative
+    assert statistics.median(errors) < 0.01, "Erreur médiane de Barnes-Hut trop élevée"
+
+
+@pytest.mark.parametrize("count", [50, 300])
+def test_grid_collisions_match_all_pairs(count):
+    """Test que la grille uniforme trouve exactement les paires de la recherche exhaustive."""
+    bodies = random_bodies(count, seed=count, extent=1e9, radius=5e7)
+    expected = check_all_collisions(bodies)
+
+    assert expected, "La scène générée devrait contenir des collisions"
+    state = BodyState.from_bodies(bodies)
+    assert uniform_grid_pairs(state.x, state.y, state.z, state.radius) == expected
+
+
+def test_barnes_hut_reports_collisions():
+    """Test que le chemin Barnes-Hut remplit aussi la liste des collisions."""
+    bodies = random_bodies(BARNES_HUT_THRESHOLD + 1, seed=2, extent=1e10, radius=1e8)
+    collisions = []
+
+    compute_all_forces(BodyState.from_bodies(bodies), collisions)
+
+    assert collisions, "La scène générée devrait contenir des collisions"
+    assert collisions == check_all_collisions(bodies)
+
+
+def test_group_collisions_merges_chains():
+    """Test qu'une chaîne A-B, B-C forme un seul groupe, même sans paire A-C."""
+    assert group_collisions([(0, 1), (1, 2)]) == [[0, 1, 2]]
+
+
+def test_group_collisions_keeps_disjoint_groups():
+    """Test que des collisions sans corps commun restent dans des groupes séparés."""
+    assert group_collisions([(4, 5), (0, 3), (3, 1)]) == [[0, 1, 3], [4, 5]]
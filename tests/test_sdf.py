@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+
+"""
+Tests de la fonction SDF générée par compile_scene.
+Elle doit donner les mêmes résultats que les SDF de chaque corps.
+"""
+
+import random
+import pytest
+
+from src.core.sdf import (sphere_sdf, cylinder_sdf, box_sdf, torus_sdf, pack_scene, compile_scene,
+                          min_sdf)
+
+BODY_SDFS = {"sphere": sphere_sdf, "cylinder": cylinder_sdf, "box": box_sdf, "torus": torus_sdf}
+
+SCENE = [
+    {"type": "sphere", "position": {"x": 0, "y": 0, "z": 0}, "radius": 1},
+    {"type": "cylinder", "position": {"x": 3, "y": -2, "z": 1}, "radius": 1.5, "height": 4},
+    # Deux cylindres infinis, le premier sur le même axe que le premier cylindre
+    {"type": "cylinder", "position": {"x": 3, "y": -2, "z": 0}, "radius": 1.5},
+    {"type": "cylinder", "position": {"x": -5, "y": 5, "z": 0}, "radius": 0.5},
+    {"type": "box", "position": {"x": -3, "y": 2, "z": -1}, "sides": {"x": 2, "y": 3, "z": 4}},
+    {"type": "torus", "position": {"x": 0, "y": 4, "z": 2}, "inner_radius": 3, "outer_radius": 1},
+    # Doublon exact de la sphère : à distance égale, le premier corps l'emporte
+    {"type": "sphere", "position": {"x": 0, "y": 0, "z": 0}, "radius": 1},
+]
+
+
+def reference_min_sdf(point, bodies):
+    """Minimum des SDF de chaque corps, le premier corps gagnant en cas d'égalité."""
+    distances = [BODY_SDFS[body["type"]](point, body) for body in bodies]
+    min_dist = min(distances)
+    return min_dist, distances.index(min_dist)
+
+
+def test_compiled_scene_matches_body_sdfs():
+    """Test que la SDF compilée donne la distance et le corps des SDF de chaque corps."""
+    scene_sdf = compile_scene(pack_scene(SCENE))
+    rng = random.Random(0)
+
+    for _ in range(2000):
+        x, y, z = (rng.uniform(-10, 10) for _ in range(3))
+        expected_dist, expected_index = reference_min_sdf({"x": x, "y": y, "z": z}, SCENE)
+        dist, index = scene_sdf(x, y, z)
+
+        assert dist == pytest.approx(expected_dist), f"Distance incorrecte en ({x}, {y}, {z})"
+        assert index == expected_index, f"Corps le plus proche incorrect en ({x}, {y}, {z})"
+
+
+@pytest.mark.parametrize("point", [
+    # Centre de la sphère et de son doublon
+    {"x": 0, "y": 0, "z": 0},
+    # Au milieu de la hauteur du cylindre fini : même distance que le cylindre infini
+    {"x": 3, "y": 0, "z": 1},
+])
+def test_compiled_scene_ties_go_to_first_body(point):
+    """Test qu'à distance égale, la SDF compilée et min_sdf renvoient le premier corps."""
+    expected = reference_min_sdf(point, SCENE)
+
+    assert compile_scene(pack_scene(SCENE))(point["x"], point["y"], point["z"]) == expected
+    assert min_sdf(point, SCENE) == expected